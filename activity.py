@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+WEEKDAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+HOUR_LABELS = [f"{h:02d}:00" for h in range(24)]
+
+# Upper bounds on what we send to the browser. A year of daily data fits
+# comfortably; anything longer is bucketed server-side.
+MAX_CALENDAR_WEEKS = 53
+MAX_MONTHS = 36
+MAX_TURN_BINS = 30
+
+
+def _bucket_columns(grid: np.ndarray, max_cols: int) -> np.ndarray:
+    """Sum adjacent columns so the grid has at most `max_cols` columns."""
+    n_cols = grid.shape[1]
+    if n_cols <= max_cols:
+        return grid
+    factor = -(-n_cols // max_cols)
+    pad = (-n_cols) % factor
+    if pad:
+        grid = np.pad(grid, ((0, 0), (0, pad)))
+    return grid.reshape(grid.shape[0], -1, factor).sum(axis=2)
+
+
+def compute_activity_series(starts: Sequence[float], turns: Sequence[int]) -> Dict[str, Any]:
+    """Chart-ready aggregates from conversation start times and turn counts.
+
+    All time buckets are UTC, matching the rest of the page. The whole
+    computation is a handful of numpy passes over the start timestamps.
+    """
+    ts = np.asarray(starts, dtype=np.float64)
+    ts = ts[np.isfinite(ts)].astype(np.int64)
+    turn_arr = np.asarray(turns, dtype=np.int64)
+
+    series: Dict[str, Any] = {
+        "hour_weekday": np.zeros((7, 24), dtype=np.int64),
+        "calendar": None,
+        "monthly": None,
+        "turns_hist": None,
+    }
+
+    if ts.size:
+        day = ts // 86400
+        hour = (ts % 86400) // 3600
+        # 1970-01-01 was a Thursday (weekday 3 with Monday = 0).
+        weekday = (day + 3) % 7
+        series["hour_weekday"] = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
+
+        # Calendar heatmap: rows are weekdays, columns are weeks starting on the
+        # Monday on or before the first chat.
+        first_monday = day.min() - (day.min() + 3) % 7
+        offset = day - first_monday
+        n_weeks = int(offset.max() // 7) + 1
+        grid = np.bincount(offset, minlength=n_weeks * 7).reshape(n_weeks, 7).T
+        days_per_col = 7 * (-(-n_weeks // MAX_CALENDAR_WEEKS)) if n_weeks > MAX_CALENDAR_WEEKS else 7
+        grid = _bucket_columns(grid, MAX_CALENDAR_WEEKS)
+        col_starts = (first_monday + np.arange(grid.shape[1]) * days_per_col) * 86400
+        series["calendar"] = {
+            "grid": grid,
+            "column_labels": [datetime.fromtimestamp(int(s), tz=timezone.utc).strftime("%Y-%m-%d") for s in col_starts],
+            "days_per_column": days_per_col,
+        }
+
+        months = ts.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+        first_month = int(months.min())
+        month_counts = np.bincount(months - first_month)
+        months_per_bar = -(-month_counts.size // MAX_MONTHS)
+        month_counts = _bucket_columns(month_counts[np.newaxis, :], MAX_MONTHS)[0]
+        month_starts = np.datetime64("1970-01", "M") + first_month + np.arange(month_counts.size) * months_per_bar
+        series["monthly"] = {
+            "counts": month_counts,
+            "labels": [str(m) for m in month_starts],
+            "months_per_bar": months_per_bar,
+        }
+
+    if turn_arr.size:
+        max_turns = int(turn_arr.max())
+        # Whole-number bin width so every bucket covers the same count of turns.
+        width = -(-(max_turns + 1) // MAX_TURN_BINS)
+        edges = np.arange(0, max_turns + 1 + width, width)
+        counts, edges = np.histogram(turn_arr, bins=edges)
+        series["turns_hist"] = {"counts": counts, "edges": edges}
+
+    return series
+
+
+def build_activity_figures(series: Dict[str, Any]) -> Dict[str, Any]:
+    """Build plotly figures from `compute_activity_series` output."""
+    import plotly.graph_objects as go
+
+    figures: Dict[str, Any] = {}
+    layout = dict(margin=dict(l=10, r=10, t=40, b=10), height=320)
+
+    if series["hour_weekday"].any():
+        figures["hour_weekday"] = go.Figure(
+            go.Heatmap(
+                z=series["hour_weekday"].tolist(),
+                x=HOUR_LABELS,
+                y=WEEKDAY_LABELS,
+                colorscale="Purples",
+                hovertemplate="%{y} %{x}: %{z} chats<extra></extra>",
+            ),
+            layout=dict(title="Chats by hour and weekday (UTC)", yaxis=dict(autorange="reversed"), **layout),
+        )
+
+    calendar = series["calendar"]
+    if calendar is not None:
+        period = "Week" if calendar["days_per_column"] == 7 else f"{calendar['days_per_column']} days"
+        figures["calendar"] = go.Figure(
+            go.Heatmap(
+                z=calendar["grid"].tolist(),
+                x=calendar["column_labels"],
+                y=WEEKDAY_LABELS,
+                colorscale="Greens",
+                xgap=2,
+                ygap=2,
+                hovertemplate=f"{period} of %{{x}}, %{{y}}: %{{z}} chats<extra></extra>",
+            ),
+            layout=dict(title="Daily activity", yaxis=dict(autorange="reversed"), **layout),
+        )
+
+    monthly = series["monthly"]
+    if monthly is not None:
+        figures["monthly"] = go.Figure(
+            go.Bar(x=monthly["labels"], y=monthly["counts"].tolist(), marker_color="#7c3aed"),
+            layout=dict(title="Chats per month", **layout),
+        )
+
+    turns_hist = series["turns_hist"]
+    if turns_hist is not None:
+        edges = turns_hist["edges"]
+        labels = [f"{lo}–{hi - 1}" if hi - lo > 1 else str(lo) for lo, hi in zip(edges[:-1].tolist(), edges[1:].tolist())]
+        figures["turns_hist"] = go.Figure(
+            go.Bar(x=labels, y=turns_hist["counts"].tolist(), marker_color="#f59e0b"),
+            layout=dict(title="Turns per conversation", xaxis_title="Turns", yaxis_title="Conversations", **layout),
+        )
+
+    return figures
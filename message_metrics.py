@@ -0,0 +1,89 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from quantiles import KLLSketch
+from snapshot import message_times
+
+METRICS = {
+    "response_gap": "Assistant response time",
+    "think_time": "Your think time between turns",
+    "user_length": "Your message length",
+    "assistant_length": "Assistant message length",
+}
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def _char_lengths(offsets: np.ndarray, blob: np.ndarray) -> np.ndarray:
+    """Character counts of UTF-8 strings packed in `blob` at `offsets`."""
+    base = int(offsets[0])
+    data = np.asarray(blob[base:int(offsets[-1])])
+    # Every byte except UTF-8 continuation bytes (0b10xxxxxx) starts a character.
+    char_cum = np.zeros(data.size + 1, dtype=np.int64)
+    np.cumsum((data & 0xC0) != 0x80, out=char_cum[1:])
+    local = np.asarray(offsets) - base
+    return char_cum[local[1:]] - char_cum[local[:-1]]
+
+
+def message_metric_sketches(
+    table: Dict[str, Any],
+    conv_indices: Sequence[int],
+    shard_messages: int = 65536,
+    k: int = 200,
+    seed: Optional[int] = None,
+) -> Dict[str, KLLSketch]:
+    """Stream the messages of `conv_indices` into one quantile sketch per metric.
+
+    Messages are processed in shards of roughly `shard_messages`, cut on
+    conversation boundaries so no turn pair is split. Each shard builds its
+    own sketches, which are merged into the totals, so working memory stays
+    bounded by the shard size. Only user and assistant messages are used;
+    gaps pair each message with the next one in time within a conversation.
+    """
+    cols = table["columns"]
+    roles = table["roles"]
+    user = roles.index("user") if "user" in roles else -2
+    assistant = roles.index("assistant") if "assistant" in roles else -2
+    msg_conv = cols["msg_conv"]
+    in_scope = np.zeros(cols["conv_create_time"].size, dtype=bool)
+    in_scope[np.asarray(conv_indices, dtype=np.int64)] = True
+
+    rng = np.random.default_rng(seed)
+    totals = {name: KLLSketch(k, seed=int(rng.integers(2**31))) for name in METRICS}
+    lo = 0
+    while lo < msg_conv.size:
+        hi = min(lo + shard_messages, msg_conv.size)
+        hi = int(np.searchsorted(msg_conv, msg_conv[hi - 1], side="right"))
+        conv = np.asarray(msg_conv[lo:hi])
+        role = np.asarray(cols["msg_role"][lo:hi])
+        keep = in_scope[conv] & ((role == user) | (role == assistant))
+
+        if keep.any():
+            shard = {name: KLLSketch(k, seed=int(rng.integers(2**31))) for name in METRICS}
+            lengths = _char_lengths(cols["msg_text_offsets"][lo:hi + 1], cols["msg_text_blob"])
+            shard["user_length"].update(lengths[keep & (role == user) & (lengths > 0)])
+            shard["assistant_length"].update(lengths[keep & (role == assistant) & (lengths > 0)])
+
+            t = message_times(table, lo, hi)
+            timed = keep & ~np.isnan(t)
+            conv, role, t = conv[timed], role[timed], t[timed]
+            order = np.lexsort((t, conv))
+            conv, role, t = conv[order], role[order], t[order]
+            same_conv = conv[1:] == conv[:-1]
+            gap = t[1:] - t[:-1]
+            shard["response_gap"].update(gap[same_conv & (role[:-1] == user) & (role[1:] == assistant)])
+            shard["think_time"].update(gap[same_conv & (role[:-1] == assistant) & (role[1:] == user)])
+
+            for name, sketch in shard.items():
+                totals[name].merge(sketch)
+        lo = hi
+    return totals
+
+
+def summarize_sketches(sketches: Dict[str, KLLSketch]) -> Dict[str, Dict[str, Any]]:
+    """p50/p90/p99 and sample count for each metric."""
+    summary = {}
+    for name, sketch in sketches.items():
+        p50, p90, p99 = sketch.quantiles(PERCENTILES)
+        summary[name] = {"count": len(sketch), "p50": p50, "p90": p90, "p99": p99}
+    return summary
@@ -0,0 +1,197 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 4
+# Shingles hashed per batch; bounds the temporary arrays to a few MB.
+_SHINGLE_BATCH = 1 << 20
+
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so trivial edits still match."""
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def lsh_params(threshold: float, num_perm: int, fn_weight: float = 0.9) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows == num_perm minimising weighted LSH error.
+
+    A pair with Jaccard similarity s becomes a candidate with probability
+    1 - (1 - s ** rows) ** bands. False positives (s < threshold) are only
+    wasted verification, while false negatives are missed duplicates, so the
+    error is weighted towards misses and the chosen S-curve midpoint,
+    (1 / bands) ** (1 / rows), sits below `threshold`.
+    """
+    below = np.linspace(0.0, threshold, 256)
+    above = np.linspace(threshold, 1.0, 256)
+
+    def error(bands: int, rows: int) -> float:
+        false_pos = (1.0 - (1.0 - below ** rows) ** bands).mean() * threshold
+        false_neg = ((1.0 - above ** rows) ** bands).mean() * (1.0 - threshold)
+        return (1.0 - fn_weight) * false_pos + fn_weight * false_neg
+
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    options = [br for br in options if (1.0 / br[0]) ** (1.0 / br[1]) < threshold] or options
+    return min(options, key=lambda br: error(*br))
+
+
+def minhash_signatures(
+    texts: Sequence[str],
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = 1,
+) -> np.ndarray:
+    """MinHash signatures (len(texts) x num_perm, uint32) over byte shingles.
+
+    Each text is UTF-8 encoded and every `shingle_size`-byte window (at most
+    8 bytes) becomes one integer shingle; texts shorter than that are one
+    shingle. Hashing is vectorised over all shingles with multiply-shift
+    hash functions, so cost is linear in the total text length.
+    """
+    encoded = [t.encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    blob = np.frombuffer(b"".join(encoded) + b"\x00" * shingle_size, dtype=np.uint8)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    rng = np.random.default_rng(seed)
+    mult = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    add = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+
+    counts = np.maximum(lengths - shingle_size + 1, 1)
+    cum_counts = np.concatenate([[0], np.cumsum(counts)])
+    first = 0
+    while first < len(texts):
+        # Take whole texts until the batch holds about _SHINGLE_BATCH shingles.
+        last = int(np.searchsorted(cum_counts, cum_counts[first] + _SHINGLE_BATCH, side="right")) - 1
+        last = min(max(last, first + 1), len(texts))
+        batch_counts = counts[first:last]
+        seg_starts = np.concatenate([[0], np.cumsum(batch_counts)[:-1]])
+        positions = np.arange(int(batch_counts.sum())) + np.repeat(offsets[first:last] - seg_starts, batch_counts)
+
+        shingles = np.zeros(positions.size, dtype=np.uint64)
+        for i in range(shingle_size):
+            byte = blob[positions + i].astype(np.uint64)
+            # Bytes past the end of a short text are masked out as zero.
+            byte[np.repeat(lengths[first:last], batch_counts) <= i] = 0
+            shingles |= byte << np.uint64(8 * i)
+
+        hashed = np.empty_like(shingles)
+        for j in range(num_perm):
+            np.multiply(shingles, mult[j], out=hashed)
+            hashed += add[j]
+            hashed >>= np.uint64(32)
+            signatures[first:last, j] = np.minimum.reduceat(hashed, seg_starts)
+        first = last
+    return signatures
+
+
+def _leader_clusters(n: int, left: np.ndarray, right: np.ndarray) -> List[np.ndarray]:
+    """Greedy star clustering over verified pairs.
+
+    The node with the most matches leads a cluster of its still-unassigned
+    neighbours; repeat until no pairs are left. Every member is therefore a
+    direct match of its leader, so clusters cannot chain A~B~C into A~C.
+    """
+    nodes = np.concatenate([left, right])
+    neighbours = np.concatenate([right, left])
+    order = np.argsort(nodes, kind="stable")
+    nodes, neighbours = nodes[order], neighbours[order]
+    starts = np.searchsorted(nodes, np.arange(n + 1))
+    degree = np.diff(starts)
+
+    assigned = np.zeros(n, dtype=bool)
+    clusters = []
+    for leader in np.argsort(-degree, kind="stable")[:np.count_nonzero(degree)]:
+        if assigned[leader]:
+            continue
+        members = neighbours[starts[leader]:starts[leader + 1]]
+        members = members[~assigned[members]]
+        if members.size:
+            cluster = np.concatenate([[leader], members])
+            assigned[cluster] = True
+            clusters.append(cluster)
+    return clusters
+
+
+def near_duplicate_clusters(
+    texts: Sequence[str],
+    threshold: float = 0.7,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+) -> List[np.ndarray]:
+    """Group texts whose estimated Jaccard similarity is at least `threshold`.
+
+    Signatures are split into LSH bands; every text in a band bucket is
+    checked against the bucket's first text, and pairs whose signatures agree
+    on at least `threshold` of positions are matches. Matches are grouped
+    around a leader (see `_leader_clusters`). Returns clusters of two or more
+    indices into `texts`, leader first, largest cluster first. Roughly linear
+    in the number of texts.
+    """
+    n = len(texts)
+    if n < 2:
+        return []
+    signatures = minhash_signatures(texts, num_perm, shingle_size)
+    bands, rows = lsh_params(threshold, num_perm)
+    mix = np.random.default_rng(0).integers(1, 2**63, size=rows, dtype=np.uint64) | np.uint64(1)
+
+    left: List[np.ndarray] = []
+    right: List[np.ndarray] = []
+    for band in range(bands):
+        band_sig = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (band_sig * mix).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        bucket_start = np.flatnonzero(np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]]))
+        first = np.repeat(order[bucket_start], np.diff(np.append(bucket_start, n)))
+        u, v = first[first != order], order[first != order]
+        agree = (signatures[u] == signatures[v]).mean(axis=1) >= threshold
+        left.append(u[agree])
+        right.append(v[agree])
+
+    # The same pair can match in several bands; keep it once.
+    pairs = np.unique(np.concatenate(left).astype(np.int64) * n + np.concatenate(right))
+    clusters = _leader_clusters(n, pairs // n, pairs % n)
+    clusters.sort(key=lambda c: (-c.size, int(c[0])))
+    return clusters
+
+
+def repeated_prompts(
+    texts: Sequence[str],
+    conv_ids: Sequence[int],
+    threshold: float = 0.7,
+    min_chars: int = 15,
+    top: int = 5,
+) -> List[Dict[str, Any]]:
+    """The `top` near-duplicate prompt groups spread over the most conversations.
+
+    Prompts shorter than `min_chars` after normalisation ("thanks", "go on")
+    are skipped, as are groups confined to one conversation: an export keeps
+    every edited or regenerated prompt, so those are rewrites, not repeats.
+    Each group reports how many times it was asked, across how many
+    conversations, and its most common wording; groups are ranked by
+    conversations, then by count.
+    """
+    normalized = [normalize_prompt(t) for t in texts]
+    keep = [i for i, t in enumerate(normalized) if len(t) >= min_chars]
+    clusters = near_duplicate_clusters([normalized[i] for i in keep], threshold)
+
+    results = []
+    for cluster in clusters:
+        members = [keep[i] for i in cluster]
+        conversations = len({conv_ids[i] for i in members})
+        if conversations < 2:
+            continue
+        wording, _count = Counter(texts[i].strip() for i in members).most_common(1)[0]
+        results.append({
+            "count": len(members),
+            "conversations": conversations,
+            "example": wording,
+        })
+    results.sort(key=lambda r: (-r["conversations"], -r["count"]))
+    return results[:top]
@@ -0,0 +1,75 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Memory is O(k log(n / k)) regardless of how many values are added; rank
+    error is roughly 1.7% at the default k=200. Two sketches built over
+    separate shards can be combined with `merge`.
+    """
+
+    _DECAY = 2.0 / 3.0
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * self._DECAY ** depth)))
+
+    def _compress(self) -> None:
+        while sum(items.size for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for h, items in enumerate(self.levels):
+                if items.size < self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so the promoted half is exact.
+                leftover, items = (items[:1], items[1:]) if items.size % 2 else (items[:0], items)
+                offset = int(self._rng.integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[offset::2]])
+                self.levels[h] = leftover
+                break
+
+    def update(self, values: Sequence[float]) -> None:
+        """Add values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.n += values.size
+        # A large batch is compacted in a few vectorised passes rather than
+        # k items at a time; the sketch is back within its bound on return.
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Fold `other` into this sketch."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Approximate values at each rank in `qs` (0..1); NaN when empty."""
+        if not self.n:
+            return [float("nan")] * len(qs)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size, 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cum = np.cumsum(weights[order])
+        ranks = np.searchsorted(cum, np.asarray(qs, dtype=np.float64) * cum[-1], side="left")
+        return values[order][np.minimum(ranks, values.size - 1)].tolist()
+
+    def quantile(self, q: float) -> float:
+        return self.quantiles([q])[0]
@@ -0,0 +1,195 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+CARD_SIZE = (720, 1280)
+_MARGIN = 64
+
+# Top and bottom gradient colours per card, matching the video's palette.
+PALETTES = {
+    "title": ((124, 58, 237), (236, 72, 153)),
+    "total": ((37, 99, 235), (124, 58, 237)),
+    "peak_hour": ((245, 158, 11), (239, 68, 68)),
+    "streak": ((16, 185, 129), (37, 99, 235)),
+    "persona": ((236, 72, 153), (124, 58, 237)),
+    "themes": ((14, 165, 233), (16, 185, 129)),
+}
+
+_FONT_CANDIDATES = {
+    "bold": ["DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf", "Helvetica-Bold.ttf"],
+    "regular": ["DejaVuSans.ttf", "Arial.ttf", "arial.ttf", "Helvetica.ttf"],
+}
+
+
+@lru_cache(maxsize=None)
+def _font(weight: str, size: int) -> ImageFont.ImageFont:
+    for name in _FONT_CANDIDATES[weight]:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def _background(palette: str, size: Tuple[int, int] = CARD_SIZE) -> Image.Image:
+    """Vertical gradient with a soft glow, built once per palette and reused."""
+    top, bottom = (np.array(c, dtype=np.float32) for c in PALETTES[palette])
+    width, height = size
+    ramp = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None, None]
+    pixels = np.broadcast_to(top + (bottom - top) * ramp, (height, width, 3)).copy()
+    yy, xx = np.ogrid[:height, :width]
+    glow = np.exp(-(((xx - width * 0.8) / (width * 0.6)) ** 2 + ((yy - height * 0.2) / (height * 0.35)) ** 2))
+    pixels += 60.0 * glow[:, :, None].astype(np.float32)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+
+
+def preload() -> None:
+    """Load fonts and build every background so the first render is fast."""
+    for palette in PALETTES:
+        _background(palette)
+    for size in range(60, 151, 10):
+        _font("bold", size)
+    _font("regular", 44)
+    _font("regular", 40)
+    _font("bold", 36)
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.ImageFont, max_width: int) -> List[str]:
+    lines: List[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and draw.textlength(candidate, font=font) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def card_specs(stats: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn page stats into the ordered list of cards to draw.
+
+    Cards whose stat is missing (e.g. no persona without an API key) are
+    left out.
+    """
+    year = stats.get("year", "")
+    specs = [{"key": "title", "eyebrow": "ChatWrapped", "headline": str(year), "caption": "Your year in AI conversations"}]
+    if stats.get("total_chats") is not None:
+        caption = "conversations with your AI"
+        if stats.get("avg_per_day") is not None:
+            caption += f" - about {stats['avg_per_day']:.1f} a day"
+        specs.append({"key": "total", "eyebrow": "You had", "headline": f"{stats['total_chats']:,}", "caption": caption})
+    if stats.get("peak_hour_label"):
+        specs.append({
+            "key": "peak_hour",
+            "eyebrow": "Your peak hour",
+            "headline": stats["peak_hour_label"],
+            "caption": f"You're a {stats['peak_hour_category']}" if stats.get("peak_hour_category") else "",
+        })
+    if stats.get("streak_days"):
+        day_word = "day" if stats["streak_days"] == 1 else "days in a row"
+        caption = f"{day_word}, {stats['streak_range']}" if stats.get("streak_range") else day_word
+        specs.append({"key": "streak", "eyebrow": "Longest streak", "headline": str(stats["streak_days"]), "caption": caption})
+    if stats.get("persona"):
+        specs.append({"key": "persona", "eyebrow": "You are a", "headline": stats["persona"], "caption": "Your chat persona"})
+    if stats.get("themes"):
+        specs.append({
+            "key": "themes",
+            "eyebrow": "You talked about",
+            "headline": stats["themes"][0],
+            "caption": " - ".join(stats["themes"][1:3]),
+        })
+    return specs
+
+
+def render_card(spec: Dict[str, Any], fmt: str = "PNG") -> bytes:
+    """Draw one card and return it encoded as `fmt` (PNG or WEBP)."""
+    image = _background(spec["key"]).copy()
+    draw = ImageDraw.Draw(image)
+    width, height = image.size
+    max_width = width - 2 * _MARGIN
+
+    eyebrow_font = _font("regular", 44)
+    caption_font = _font("regular", 40)
+    # Shrink long headlines ("Hopeless Romantic") until they fit on two lines.
+    headline_size = 150
+    while True:
+        headline_font = _font("bold", headline_size)
+        headline_lines = _wrap(draw, spec["headline"], headline_font, max_width)
+        fits = len(headline_lines) <= 2 and all(draw.textlength(line, font=headline_font) <= max_width for line in headline_lines)
+        if fits or headline_size <= 60:
+            break
+        headline_size -= 10
+
+    y = int(height * 0.32)
+    draw.text((_MARGIN, y), spec["eyebrow"].upper(), font=eyebrow_font, fill=(235, 235, 245))
+    y += 80
+    for line in headline_lines:
+        draw.text((_MARGIN, y), line, font=headline_font, fill="white")
+        y += int(headline_size * 1.15)
+    y += 30
+    for line in _wrap(draw, spec["caption"], caption_font, max_width):
+        draw.text((_MARGIN, y), line, font=caption_font, fill=(255, 255, 255))
+        y += 54
+    draw.text((_MARGIN, height - _MARGIN - 40), "ChatWrapped", font=_font("bold", 36), fill=(255, 255, 255))
+
+    buf = io.BytesIO()
+    if fmt.upper() == "WEBP":
+        image.save(buf, format="WEBP", quality=90, method=0)
+    else:
+        image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+def stats_hash(stats: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(stats, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_CACHE_SIZE = 64
+_cache: "OrderedDict[Tuple[str, str], List[Tuple[str, bytes]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Pillow releases the GIL while drawing and encoding, so threads scale with cores.
+        _executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="share-cards")
+    return _executor
+
+
+def render_share_cards(stats: Dict[str, Any], fmt: str = "PNG") -> List[Tuple[str, bytes]]:
+    """Render every card for `stats` in parallel; results are cached by stats hash.
+
+    Returns (card key, encoded image) pairs in display order.
+    """
+    key = (stats_hash(stats), fmt.upper())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return list(_cache[key])
+    specs = card_specs(stats)
+    images = _pool().map(lambda spec: render_card(spec, key[1]), specs)
+    cards = [(spec["key"], image) for spec, image in zip(specs, images)]
+    with _cache_lock:
+        _cache[key] = cards
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return list(cards)
@@ -0,0 +1,138 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+
+def table_nbytes(table: Dict[str, Any]) -> int:
+    """Heap bytes held by a table's columns.
+
+    Memory-mapped columns are not counted: their pages belong to the OS page
+    cache and are dropped under memory pressure.
+    """
+    return int(sum(arr.nbytes for arr in table["columns"].values() if not isinstance(arr, np.memmap)))
+
+
+class _Entry:
+    __slots__ = ("value", "nbytes")
+
+    def __init__(self, value: Any, nbytes: int):
+        self.value = value
+        self.nbytes = nbytes
+
+
+class CacheLease:
+    """A session's hold on a cache entry.
+
+    Released explicitly with `release()`, or automatically when the lease is
+    garbage collected (e.g. when the Streamlit session that stored it ends).
+    """
+
+    def __init__(self, cache: "SharedCache", key: Hashable):
+        self.key = key
+        self._finalizer = weakref.finalize(self, cache._release, key)
+
+    def release(self) -> None:
+        self._finalizer()
+
+
+class SharedCache:
+    """Process-wide LRU cache with reference counts, a global byte budget
+    and an optional cap on the number of entries.
+
+    The entry cap bounds what the byte budget cannot see: memory-mapped
+    tables cost no heap but each keeps its file mapped and a descriptor open.
+    Only entries no live session has leased are evicted. If a limit is
+    still exceeded after that, the new entry is not cached, so `put` never
+    pushes out another session's data. Reference counts are kept per key,
+    so a lease survives eviction and re-insertion of its entry.
+    """
+
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refs: Dict[Hashable, int] = {}
+        self._lock = threading.RLock()
+        self._resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> bool:
+        """Cache `value`; returns False if it could not fit within the budget."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._resident -= old.nbytes
+            if nbytes > self.max_bytes:
+                return False
+            self._entries[key] = _Entry(value, nbytes)
+            self._resident += nbytes
+            self._evict(keep=key)
+            if self._over_budget():
+                self._resident -= self._entries.pop(key).nbytes
+                return False
+            return True
+
+    def discard(self, key: Hashable) -> bool:
+        """Drop `key` unless a session has leased it; returns False if it is leased."""
+        with self._lock:
+            if key in self._refs:
+                return False
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._resident -= entry.nbytes
+            return True
+
+    def lease(self, key: Hashable) -> CacheLease:
+        with self._lock:
+            self._refs[key] = self._refs.get(key, 0) + 1
+        return CacheLease(self, key)
+
+    def _release(self, key: Hashable) -> None:
+        with self._lock:
+            refs = self._refs.pop(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+            self._evict()
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self._resident > self.max_bytes
+
+    def _evict(self, keep: Optional[Hashable] = None) -> None:
+        """Drop unleased entries, least recently used first, until within budget."""
+        for key in [k for k in self._entries if k not in self._refs and k != keep]:
+            if not self._over_budget():
+                return
+            self._resident -= self._entries.pop(key).nbytes
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "leased_entries": sum(1 for k in self._entries if k in self._refs),
+                "resident_bytes": self._resident,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
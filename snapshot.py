@@ -0,0 +1,325 @@
+import json
+import os
+import struct
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# On-disk layout (all integers little-endian):
+#   8 bytes   magic
+#   4 bytes   format version (uint32)
+#   4 bytes   header length in bytes (uint32)
+#   N bytes   JSON header: source hash, role table and column directory
+#   ...       raw column data, each column aligned to ALIGNMENT bytes
+# Columns are plain numpy arrays, so loading is a header parse plus one
+# np.memmap per column; no message text is touched until it is read.
+MAGIC = b"CWSNAP\x00\x00"
+SNAPSHOT_VERSION = 1
+ALIGNMENT = 64
+SNAPSHOT_SUFFIX = ".cwsnap"
+DEFAULT_SNAPSHOT_DIR = ".chatwrapped_snapshots"
+DEFAULT_SNAPSHOT_MB = 1024
+
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def snapshot_path(source_hash: str, directory: Optional[str] = None) -> str:
+    directory = directory or os.getenv("CHATWRAPPED_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+    return os.path.join(directory, source_hash + SNAPSHOT_SUFFIX)
+
+
+def snapshot_budget_bytes() -> int:
+    """Disk budget for snapshots from CHATWRAPPED_SNAPSHOT_MB; 0 turns snapshots off."""
+    return int(float(os.getenv("CHATWRAPPED_SNAPSHOT_MB", DEFAULT_SNAPSHOT_MB)) * 1024 * 1024)
+
+
+def prune_snapshots(
+    max_bytes: int,
+    directory: Optional[str] = None,
+    release: Optional[Callable[[str], bool]] = None,
+) -> None:
+    """Delete least-recently-used snapshots until the directory fits in `max_bytes`.
+
+    Recency is the file's mtime; callers bump it when a snapshot is reused.
+    `release(source_hash)` is called before a snapshot is deleted so callers
+    can drop tables mapped from it (a deleted file stays on disk while
+    mapped); if it returns False the snapshot is in use and is kept.
+    """
+    directory = directory or os.getenv("CHATWRAPPED_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+    try:
+        entries = [e for e in os.scandir(directory) if e.name.endswith(SNAPSHOT_SUFFIX) and e.is_file()]
+    except OSError:
+        return
+    files = []
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _mtime, size, _path in files)
+    for _mtime, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if release is not None and not release(os.path.basename(path)[:-len(SNAPSHOT_SUFFIX)]):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def _time_or_nan(x: Any) -> float:
+    try:
+        return float(x) if x is not None else float("nan")
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _nan_to_none(x: float) -> Optional[float]:
+    x = float(x)
+    return None if np.isnan(x) else x
+
+
+def _message_text(msg: Dict[str, Any]) -> str:
+    content = msg.get("content", {})
+    if isinstance(content, dict):
+        parts = content.get("parts", [])
+        if isinstance(parts, list):
+            return " ".join(p for p in parts if isinstance(p, str))
+        return ""
+    if isinstance(content, str):
+        return content
+    return ""
+
+
+def _pack_strings(strings: List[str]) -> Dict[str, np.ndarray]:
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {"offsets": offsets, "blob": np.frombuffer(b"".join(encoded), dtype=np.uint8)}
+
+
+def _unpack_strings(offsets: np.ndarray, blob: np.ndarray, indices: Sequence[int]) -> List[str]:
+    indices = np.asarray(indices, dtype=np.int64)
+    begins = offsets[indices].tolist()
+    ends = offsets[indices + 1].tolist()
+    view = memoryview(np.asarray(blob))
+    return [str(view[b:e], "utf-8") for b, e in zip(begins, ends)]
+
+
+def extract_table(conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Flatten conversations into per-conversation and per-message columns.
+
+    Keeps what the page reads: titles, conversation create/update times and,
+    for every message in `mapping`, its role, timestamps and joined text.
+    Messages are stored grouped by conversation, so `msg_conv` is sorted.
+    """
+    titles: List[str] = []
+    conv_create: List[float] = []
+    conv_update: List[float] = []
+    msg_conv: List[int] = []
+    msg_role: List[int] = []
+    msg_create: List[float] = []
+    msg_update: List[float] = []
+    texts: List[str] = []
+    roles: Dict[str, int] = {}
+
+    for i, conv in enumerate(conversations):
+        title = conv.get("title")
+        titles.append("(untitled)" if title is None else str(title))
+        conv_create.append(_time_or_nan(conv.get("create_time")))
+        conv_update.append(_time_or_nan(conv.get("update_time")))
+        mapping = conv.get("mapping")
+        if not isinstance(mapping, dict):
+            continue
+        for node in mapping.values():
+            msg = (node or {}).get("message")
+            if not isinstance(msg, dict):
+                continue
+            author = msg.get("author", {})
+            role = author.get("role") if isinstance(author, dict) else None
+            msg_conv.append(i)
+            msg_role.append(roles.setdefault(role, len(roles)) if isinstance(role, str) else -1)
+            msg_create.append(_time_or_nan(msg.get("create_time")))
+            msg_update.append(_time_or_nan(msg.get("update_time")))
+            texts.append(_message_text(msg))
+
+    title_cols = _pack_strings(titles)
+    text_cols = _pack_strings(texts)
+    return {
+        "roles": list(roles),
+        "columns": {
+            "conv_title_offsets": title_cols["offsets"],
+            "conv_title_blob": title_cols["blob"],
+            "conv_create_time": np.asarray(conv_create, dtype=np.float64),
+            "conv_update_time": np.asarray(conv_update, dtype=np.float64),
+            "msg_conv": np.asarray(msg_conv, dtype=np.int32),
+            "msg_role": np.asarray(msg_role, dtype=np.int8),
+            "msg_create_time": np.asarray(msg_create, dtype=np.float64),
+            "msg_update_time": np.asarray(msg_update, dtype=np.float64),
+            "msg_text_offsets": text_cols["offsets"],
+            "msg_text_blob": text_cols["blob"],
+        },
+    }
+
+
+def save_snapshot(path: str, table: Dict[str, Any], source_hash: str) -> None:
+    """Write `table` (from `extract_table`) to `path` atomically."""
+    directory: Dict[str, Dict[str, Any]] = {}
+    columns = table["columns"]
+    offset = 0
+    for name, arr in columns.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        directory[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += arr.nbytes
+
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "source_hash": source_hash,
+        "roles": table["roles"],
+        "columns": directory,
+    }).encode("utf-8")
+    data_start = -(-(_PREAMBLE.size + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # A unique temp file per writer: sessions are threads sharing one pid.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with open(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, SNAPSHOT_VERSION, len(header)))
+            f.write(header)
+            for name, arr in columns.items():
+                f.seek(data_start + directory[name]["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(path: str, source_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Memory-map a snapshot written by `save_snapshot`.
+
+    Raises ValueError if the file is not a snapshot, was written by another
+    format version, or (when `source_hash` is given) came from another export.
+    """
+    with open(path, "rb") as f:
+        preamble = f.read(_PREAMBLE.size)
+        if len(preamble) < _PREAMBLE.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, header_len = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a ChatWrapped snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot version {version} is not supported (expected {SNAPSHOT_VERSION})")
+        header = json.loads(f.read(header_len).decode("utf-8"))
+    if source_hash is not None and header["source_hash"] != source_hash:
+        raise ValueError("Snapshot was built from a different export")
+
+    data_start = -(-(_PREAMBLE.size + header_len) // ALIGNMENT) * ALIGNMENT
+    columns: Dict[str, np.ndarray] = {}
+    for name, spec in header["columns"].items():
+        shape = tuple(spec["shape"])
+        if 0 in shape:
+            columns[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            columns[name] = np.memmap(path, dtype=spec["dtype"], mode="r", offset=data_start + spec["offset"], shape=shape)
+    return {"roles": header["roles"], "source_hash": header["source_hash"], "columns": columns}
+
+
+def message_times(table: Dict[str, Any], start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """Message timestamps for rows [start, stop): create time, else update time."""
+    cols = table["columns"]
+    msg_create = np.asarray(cols["msg_create_time"][start:stop])
+    return np.where(np.isnan(msg_create) | (msg_create == 0), cols["msg_update_time"][start:stop], msg_create)
+
+
+def conversation_bounds(table: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-conversation start/end times (NaN when unknown).
+
+    Uses the conversation's create/update time, falling back to the earliest
+    and latest message timestamps, like reading the export directly would.
+    """
+    cols = table["columns"]
+    conv_create = np.asarray(cols["conv_create_time"])
+    conv_update = np.asarray(cols["conv_update_time"])
+    msg_t = message_times(table)
+    has_t = ~np.isnan(msg_t)
+    msg_conv = np.asarray(cols["msg_conv"])[has_t]
+    msg_t = msg_t[has_t]
+
+    first = np.full(conv_create.size, np.inf)
+    last = np.full(conv_create.size, -np.inf)
+    np.minimum.at(first, msg_conv, msg_t)
+    np.maximum.at(last, msg_conv, msg_t)
+    first[np.isinf(first)] = np.nan
+    last[np.isinf(last)] = np.nan
+    starts = np.where(np.isnan(conv_create), first, conv_create)
+    ends = np.where(np.isnan(conv_update), last, conv_update)
+    return starts, ends
+
+
+def turn_counts(table: Dict[str, Any]) -> np.ndarray:
+    cols = table["columns"]
+    return np.bincount(cols["msg_conv"], minlength=cols["conv_create_time"].size)
+
+
+def conversation_titles(table: Dict[str, Any], indices: Sequence[int]) -> List[str]:
+    cols = table["columns"]
+    return _unpack_strings(cols["conv_title_offsets"], cols["conv_title_blob"], indices)
+
+
+def message_texts(table: Dict[str, Any], indices: Sequence[int]) -> List[str]:
+    cols = table["columns"]
+    return _unpack_strings(cols["msg_text_offsets"], cols["msg_text_blob"], indices)
+
+
+def role_mask(table: Dict[str, Any], role: str) -> np.ndarray:
+    """Boolean mask over messages sent by `role`."""
+    roles = table["roles"]
+    if role not in roles:
+        return np.zeros(table["columns"]["msg_role"].size, dtype=bool)
+    return np.asarray(table["columns"]["msg_role"]) == roles.index(role)
+
+
+def conversations_from_table(table: Dict[str, Any], indices: Sequence[int]) -> List[Dict[str, Any]]:
+    """Rebuild conversation dicts in the export's shape for the given rows.
+
+    Only the fields `extract_table` keeps are restored. Meant for handing a
+    few conversations to code that walks the raw structure (e.g. the persona
+    prompt), not for rebuilding a whole export.
+    """
+    cols = table["columns"]
+    roles = table["roles"]
+    conv_create = cols["conv_create_time"]
+    conv_update = cols["conv_update_time"]
+    msg_conv = np.asarray(cols["msg_conv"])
+    titles = conversation_titles(table, indices)
+
+    conversations: List[Dict[str, Any]] = []
+    for title, i in zip(titles, indices):
+        msg_idx = np.flatnonzero(msg_conv == i)
+        texts = message_texts(table, msg_idx)
+        mapping = {}
+        for text, j in zip(texts, msg_idx):
+            role_code = int(cols["msg_role"][j])
+            mapping[str(j)] = {"message": {
+                "author": {"role": roles[role_code] if role_code >= 0 else None},
+                "create_time": _nan_to_none(cols["msg_create_time"][j]),
+                "update_time": _nan_to_none(cols["msg_update_time"][j]),
+                "content": {"parts": [text]},
+            }}
+        conversations.append({
+            "title": title,
+            "create_time": _nan_to_none(conv_create[i]),
+            "update_time": _nan_to_none(conv_update[i]),
+            "mapping": mapping,
+        })
+    return conversations
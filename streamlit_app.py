@@ -1,13 +1,35 @@
+import hashlib
 import io
 import json
 import zipfile
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import os
 
+import numpy as np
 import streamlit as st
 from collections import Counter
 
+from activity import build_activity_figures, compute_activity_series
+from near_duplicates import repeated_prompts
+from message_metrics import METRICS, message_metric_sketches, summarize_sketches
+from shared_cache import SharedCache, table_nbytes
+from share_cards import preload as preload_share_cards, render_share_cards
+from snapshot import (
+    conversation_bounds,
+    conversation_titles,
+    conversations_from_table,
+    extract_table,
+    load_snapshot,
+    message_texts,
+    prune_snapshots,
+    role_mask,
+    save_snapshot,
+    snapshot_budget_bytes,
+    snapshot_path,
+    turn_counts,
+)
+
 # Try to import anthropic, handle gracefully if not available
 try:
     import anthropic
@@ -50,37 +72,8 @@ def load_json_or_first_json_in_zip(file_bytes: bytes) -> Union[Dict[str, Any], L
                 return json.loads(zf.read(name).decode("utf-8"))
     raise ValueError("No valid JSON found (raw or inside ZIP)")
 
-def _safe_float(x: Any) -> Optional[float]:
-    try:
-        if isinstance(x, (int, float)):
-            return float(x)
-        return float(str(x))
-    except Exception:
-        return None
-
-def _iter_mapping_messages(conv: Dict[str, Any]):
-    mapping = conv.get("mapping") if isinstance(conv, dict) else None
-    if not isinstance(mapping, dict):
-        return
-    for node in mapping.values():
-        msg = (node or {}).get("message")
-        if isinstance(msg, dict):
-            yield msg
-
-def _conversation_times(conv: Dict[str, Any]) -> Tuple[Optional[float], Optional[float]]:
-    start = _safe_float(conv.get("create_time"))
-    end = _safe_float(conv.get("update_time"))
-    msg_times: List[float] = []
-    for msg in _iter_mapping_messages(conv):
-        t = _safe_float(msg.get("create_time")) or _safe_float(msg.get("update_time"))
-        if t is not None:
-            msg_times.append(t)
-    if (start is None or end is None) and msg_times:
-        if start is None:
-            start = min(msg_times)
-        if end is None:
-            end = max(msg_times)
-    return start, end
+def _source_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
 
 def _extract_conversations(obj: Any) -> List[Dict[str, Any]]:
     if isinstance(obj, list):
@@ -89,16 +82,71 @@ def _extract_conversations(obj: Any) -> List[Dict[str, Any]]:
         return [x for x in obj["conversations"] if isinstance(x, dict)]
     return []
 
-def _filter_by_year(conversations: List[Dict[str, Any]], year: int) -> List[Dict[str, Any]]:
-    """Filter conversations to only include those from the specified year."""
-    filtered = []
-    for conv in conversations:
-        start, end = _conversation_times(conv)
-        if start is not None:
-            conv_year = datetime.fromtimestamp(start, tz=timezone.utc).year
-            if conv_year == year:
-                filtered.append(conv)
-    return filtered
+def _load_export_table(source_hash: str, read_bytes: Optional[Callable[[], bytes]] = None) -> Optional[Dict[str, Any]]:
+    """Load the export's columns from its snapshot, parsing and snapshotting on a miss.
+
+    Returns None when there is no snapshot and no file to parse. Snapshots
+    are skipped entirely when CHATWRAPPED_SNAPSHOT_MB is 0.
+    """
+    path = snapshot_path(source_hash)
+    budget = snapshot_budget_bytes()
+    if budget > 0:
+        try:
+            table = load_snapshot(path, source_hash)
+        except (OSError, ValueError):
+            table = None
+        if table is not None:
+            try:
+                os.utime(path)  # Mark as recently used for pruning
+            except OSError:
+                pass  # Read-only disk or not our file; the snapshot is still good
+            return table
+    if read_bytes is None:
+        return None
+    table = extract_table(_extract_conversations(load_json_or_first_json_in_zip(read_bytes())))
+    if budget > 0:
+        try:
+            save_snapshot(path, table, source_hash)
+            # Serve the memory-mapped copy so the parsed arrays can be freed.
+            table = load_snapshot(path, source_hash)
+        except (OSError, ValueError):
+            pass  # Snapshots are only a speed-up; keep going on a read-only disk
+        # Never delete the snapshot just written, nor one a session is viewing.
+        prune_snapshots(budget, release=lambda h: h != source_hash and _shared_cache().discard(h))
+    return table
+
+def _year_indices(starts: np.ndarray, year: int) -> np.ndarray:
+    """Indices of conversations whose start time falls in `year` (UTC)."""
+    start_years = starts[~np.isnan(starts)].astype("datetime64[s]").astype("datetime64[Y]").astype(int) + 1970
+    return np.flatnonzero(~np.isnan(starts))[start_years == year]
+
+THEME_KEYWORDS = {
+    "coding": ["code", "programming", "python", "javascript", "function", "debug", "bug", "api", "database", "sql", "html", "css", "react", "node", "git", "github"],
+    "learning": ["learn", "study", "tutorial", "course", "education", "explain", "understand", "concept", "theory", "practice", "skill"],
+    "writing": ["write", "essay", "article", "blog", "content", "story", "poem", "creative", "draft", "edit", "grammar", "style"],
+    "work": ["work", "job", "career", "project", "meeting", "presentation", "report", "business", "professional", "office", "team"],
+    "personal": ["personal", "life", "relationship", "family", "friend", "health", "fitness", "travel", "hobby", "interest", "goal"],
+    "problem_solving": ["problem", "solve", "issue", "fix", "help", "troubleshoot", "error", "solution", "advice", "recommendation"],
+    "creative": ["creative", "design", "art", "music", "drawing", "painting", "idea", "inspiration", "brainstorm", "imagine"],
+    "technical": ["technical", "system", "server", "cloud", "deployment", "configuration", "setup", "install", "tool", "software"]
+}
+
+def _theme_counts(cleaned_titles: List[str]) -> Tuple[List[Tuple[str, int]], Dict[str, List[str]]]:
+    """Themes with at least one matching title, most frequent first, plus up to 3 example titles each."""
+    theme_counts = {theme: 0 for theme in THEME_KEYWORDS.keys()}
+    theme_examples = {theme: [] for theme in THEME_KEYWORDS.keys()}
+    
+    for title in cleaned_titles:
+        for theme, keywords in THEME_KEYWORDS.items():
+            for keyword in keywords:
+                if keyword in title:
+                    theme_counts[theme] += 1
+                    if len(theme_examples[theme]) < 3:  # Keep up to 3 examples
+                        theme_examples[theme].append(title)
+                    break
+    
+    sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
+    return [(theme, count) for theme, count in sorted_themes if count > 0], theme_examples
 
 def _analyze_themes(titles: List[str]) -> str:
     """Simple theme analysis using keyword extraction and basic patterns."""
@@ -114,34 +162,7 @@ def _analyze_themes(titles: List[str]) -> str:
     if not cleaned_titles:
         return "No meaningful conversation titles found for theme analysis."
     
-    # Common theme keywords
-    theme_keywords = {
-        "coding": ["code", "programming", "python", "javascript", "function", "debug", "bug", "api", "database", "sql", "html", "css", "react", "node", "git", "github"],
-        "learning": ["learn", "study", "tutorial", "course", "education", "explain", "understand", "concept", "theory", "practice", "skill"],
-        "writing": ["write", "essay", "article", "blog", "content", "story", "poem", "creative", "draft", "edit", "grammar", "style"],
-        "work": ["work", "job", "career", "project", "meeting", "presentation", "report", "business", "professional", "office", "team"],
-        "personal": ["personal", "life", "relationship", "family", "friend", "health", "fitness", "travel", "hobby", "interest", "goal"],
-        "problem_solving": ["problem", "solve", "issue", "fix", "help", "troubleshoot", "error", "solution", "advice", "recommendation"],
-        "creative": ["creative", "design", "art", "music", "drawing", "painting", "idea", "inspiration", "brainstorm", "imagine"],
-        "technical": ["technical", "system", "server", "cloud", "deployment", "configuration", "setup", "install", "tool", "software"]
-    }
-    
-    # Count theme occurrences
-    theme_counts = {theme: 0 for theme in theme_keywords.keys()}
-    theme_examples = {theme: [] for theme in theme_keywords.keys()}
-    
-    for title in cleaned_titles:
-        for theme, keywords in theme_keywords.items():
-            for keyword in keywords:
-                if keyword in title:
-                    theme_counts[theme] += 1
-                    if len(theme_examples[theme]) < 3:  # Keep up to 3 examples
-                        theme_examples[theme].append(title)
-                    break
-    
-    # Find top themes
-    sorted_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
-    top_themes = [(theme, count) for theme, count in sorted_themes if count > 0]
+    top_themes, theme_examples = _theme_counts(cleaned_titles)
     
     if not top_themes:
         return "No clear themes detected in your conversation titles. Your chats cover a wide variety of topics!"
@@ -330,13 +351,85 @@ def _fmt_dt_relative(ts: Optional[float]) -> str:
         years = diff.days // 365
         return f"{years} year{'s' if years > 1 else ''} ago"
 
+def _fmt_duration(seconds: float) -> str:
+    if seconds != seconds:
+        return "—"
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m {int(seconds % 60)}s"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 86400:.1f}d"
+
+def _fmt_chars(chars: float) -> str:
+    if chars != chars:
+        return "—"
+    return f"{int(round(chars)):,} chars"
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _activity_figures(source_hash: str, year: int, _starts: List[float], _turns: List[int]) -> Dict[str, Any]:
+    """Build the activity charts once per upload; `_starts`/`_turns` are not hashed."""
+    return build_activity_figures(compute_activity_series(_starts, _turns))
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _message_metrics(source_hash: str, year: int, _table: Dict[str, Any], _conv_indices: np.ndarray) -> Dict[str, Dict[str, Any]]:
+    """p50/p90/p99 response, think-time and length metrics, once per upload."""
+    return summarize_sketches(message_metric_sketches(_table, _conv_indices, seed=0))
+
+
+@st.cache_resource
+def _shared_cache() -> SharedCache:
+    """One cache of export tables for every session in this server process."""
+    return SharedCache(
+        int(float(os.getenv("CHATWRAPPED_CACHE_MB", "1024")) * 1024 * 1024),
+        max_entries=int(os.getenv("CHATWRAPPED_CACHE_ENTRIES", "32")),
+    )
+
+
+def _cached_export_table(source_hash: str, read_bytes: Optional[Callable[[], bytes]] = None) -> Optional[Dict[str, Any]]:
+    cache = _shared_cache()
+    table = cache.get(source_hash)
+    if table is None:
+        table = _load_export_table(source_hash, read_bytes)
+        if table is not None:
+            cache.put(source_hash, table, table_nbytes(table))
+    return table
+
+def _hold_cache_lease(source_hash: str) -> None:
+    """Keep this session's export pinned in the shared cache until it switches files or ends."""
+    lease = st.session_state.get("cache_lease")
+    if lease is not None and lease.key == source_hash:
+        return
+    if lease is not None:
+        lease.release()
+    st.session_state["cache_lease"] = _shared_cache().lease(source_hash)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _repeated_questions(source_hash: str, year: int, _texts: List[str], _conv_ids: List[int]) -> List[Dict[str, Any]]:
+    """Largest near-duplicate prompt groups, once per upload."""
+    return repeated_prompts(_texts, _conv_ids)
+
+
+@st.cache_resource
+def _share_card_templates() -> bool:
+    """Load card fonts and backgrounds once per server process."""
+    preload_share_cards()
+    return True
+
 
 # ------------------------- Main flow ------------------------- #
-parsed = None
+table = None
 if uploaded:
     try:
-        parsed = load_json_or_first_json_in_zip(uploaded.read())
-        st.session_state["parsed_data"] = parsed
+        # Hash each upload once; reruns of the same upload reuse the hash.
+        if st.session_state.get("upload_id") != uploaded.file_id:
+            st.session_state["source_hash"] = _source_hash(uploaded.getvalue())
+            st.session_state["upload_id"] = uploaded.file_id
+        table = _cached_export_table(st.session_state["source_hash"], uploaded.getvalue)
     except json.JSONDecodeError as e:
         st.error(f"Invalid JSON: {e}")
     except zipfile.BadZipFile:
@@ -344,24 +437,36 @@ if uploaded:
     except Exception as e:
         st.error(f"Couldn't process file: {e}")
 
-if parsed is None:
-    parsed = st.session_state.get("parsed_data")
+if table is None and not uploaded and st.session_state.get("source_hash"):
+    table = _cached_export_table(st.session_state["source_hash"])
+
+if table is not None:
+    _hold_cache_lease(st.session_state["source_hash"])
+
+if os.getenv("CHATWRAPPED_CACHE_STATS"):
+    cache_stats = _shared_cache().stats()
+    with st.sidebar.expander("Shared cache"):
+        st.write(f"**Hit rate:** {cache_stats['hit_rate']:.0%} ({cache_stats['hits']} hits, {cache_stats['misses']} misses)")
+        st.write(f"**Resident:** {cache_stats['resident_bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB in {cache_stats['entries']} / {cache_stats['max_entries']} entries ({cache_stats['leased_entries']} in use)")
+        st.write(f"**Evictions:** {cache_stats['evictions']}")
 
-if parsed is not None:
-    all_convs = _extract_conversations(parsed)
+if table is not None:
     current_year = datetime.now().year
-    convs = _filter_by_year(all_convs, current_year)
+    all_starts, all_ends = conversation_bounds(table)
+    year_idx = _year_indices(all_starts, current_year)
+    titles = conversation_titles(table, year_idx)
+    total = len(year_idx)
 
-    spans = [(_conversation_times(c), c) for c in convs]
-    starts = [s for (s, _e), _c in spans if s is not None]
-    ends = [e for (_s, e), _c in spans if e is not None]
+    starts = all_starts[year_idx].tolist()
+    year_ends = all_ends[year_idx]
+    ends = year_ends[~np.isnan(year_ends)].tolist()
 
     earliest_ts = min(starts) if starts else None
     latest_ts = max(ends) if ends else None
 
     if earliest_ts is not None and latest_ts is not None and latest_ts >= earliest_ts:
         window_days = max(1.0, (latest_ts - earliest_ts) / 86400.0)
-        avg_per_day = len(convs) / window_days
+        avg_per_day = total / window_days
     else:
         avg_per_day = None
 
@@ -393,26 +498,13 @@ if parsed is not None:
         most_active_day_label = day.strftime("%Y-%m-%d") + " UTC"
         most_active_day_count = cnt
 
-    def _count_turns(conv: Dict[str, Any]) -> int:
-        if not isinstance(conv, dict):
-            return 0
-        mapping = conv.get("mapping")
-        if not isinstance(mapping, dict):
-            return 0
-        turns = 0
-        for node in mapping.values():
-            msg = (node or {}).get("message")
-            if isinstance(msg, dict):
-                turns += 1
-        return turns
+    turns_per_conv = turn_counts(table)[year_idx].tolist()
 
     longest_conv_turns = None
     longest_conv_title = None
-    if convs:
-        pairs = [(_count_turns(c), c) for c in convs]
-        if pairs:
-            longest_conv_turns, conv_ref = max(pairs, key=lambda kv: kv[0])
-            longest_conv_title = str(conv_ref.get("title", "(untitled)"))
+    if total:
+        pairs = list(zip(turns_per_conv, titles))
+        longest_conv_turns, longest_conv_title = max(pairs, key=lambda kv: kv[0])
 
     streak_len = None
     streak_range = None
@@ -436,25 +528,21 @@ if parsed is not None:
         streak_range = (best_start, best_end)
 
     # Politeness score (1–5 based on % of user messages containing please/thank you)
+    in_year = np.zeros(table["columns"]["conv_create_time"].size, dtype=bool)
+    in_year[year_idx] = True
+    user_msg_idx = np.flatnonzero(role_mask(table, "user") & in_year[table["columns"]["msg_conv"]])
+    user_texts = message_texts(table, user_msg_idx)
     polite_count = 0
-    total_user_msgs = 0
-    for conv in convs:
-        for msg in _iter_mapping_messages(conv):
-            if msg.get("author", {}).get("role") == "user":
-                parts = msg.get("content", {}).get("parts", [])
-                if isinstance(parts, list):
-                    parts = [p for p in parts if isinstance(p, str)]
-                text = " ".join(parts)
-                total_user_msgs += 1
-                if any(word in text.lower() for word in ["please", "thank you", "thanks"]):
-                    polite_count += 1
+    total_user_msgs = len(user_msg_idx)
+    for text in user_texts:
+        if any(word in text.lower() for word in ["please", "thank you", "thanks"]):
+            polite_count += 1
     politeness_ratio = polite_count / total_user_msgs if total_user_msgs else 0
     politeness_score = int(round(1 + politeness_ratio * 4)) if total_user_msgs else "—"
 
     st.subheader(f"Your {current_year} ChatWrapped Story")
     
     # Total chats
-    total = len(convs)
     st.markdown(f"### 💬 **{total}** conversations")
     st.write(f"In {current_year}, you've had a total of **{total}** conversations with your AI chatbot. That's quite the digital journey!")
     with st.expander("How is this calculated?"):
@@ -470,10 +558,9 @@ if parsed is not None:
         
         # Find the title of the first chat
         first_chat_title = "(untitled)"
-        for conv in convs:
-            start, _ = _conversation_times(conv)
-            if start is not None and abs(start - earliest_ts) < 1:  # Within 1 second tolerance
-                first_chat_title = conv.get("title", "(untitled)")
+        for start, title in zip(starts, titles):
+            if abs(start - earliest_ts) < 1:  # Within 1 second tolerance
+                first_chat_title = title
                 break
         
         st.markdown("### 🚀 **Your 2025 chat journey**")
@@ -518,9 +605,9 @@ if parsed is not None:
     st.divider()
     
     # Average conversation length
-    if convs:
-        total_turns = sum(_count_turns(conv) for conv in convs)
-        avg_conversation_length = total_turns / len(convs)
+    if total:
+        total_turns = sum(turns_per_conv)
+        avg_conversation_length = total_turns / total
         st.markdown("### 💬 **{:.1f}** turns per conversation".format(avg_conversation_length))
         if avg_conversation_length >= 20:
             st.write(f"In 2025, your average conversation length is **{avg_conversation_length:.1f}** turns. You love having deep, detailed conversations!")
@@ -687,10 +774,79 @@ if parsed is not None:
         with st.expander("How is this calculated?"):
             st.write("Finds the longest consecutive sequence of days where you had at least one chat. This groups chat start times by date, then looks for the longest run of consecutive days with at least one chat. Shows the start and end dates of your longest streak.")
 
+    st.divider()
+
+    # Activity charts
+    st.subheader(f"📈 Your {current_year} activity at a glance")
+    if starts:
+        figures = _activity_figures(st.session_state.get("source_hash", ""), current_year, starts, turns_per_conv)
+        chart_tabs = [
+            ("hour_weekday", "Hour × weekday"),
+            ("calendar", "Calendar"),
+            ("monthly", "Monthly"),
+            ("turns_hist", "Conversation length"),
+        ]
+        chart_tabs = [(key, label) for key, label in chart_tabs if key in figures]
+        for tab, (key, _label) in zip(st.tabs([label for _key, label in chart_tabs]), chart_tabs):
+            with tab:
+                st.plotly_chart(figures[key])
+        with st.expander("How is this calculated?"):
+            st.write("Buckets every conversation start time (UTC) by hour and weekday, by calendar day and by month, and bins the number of turns per conversation. Long date ranges are grouped into wider buckets before they are sent to your browser, and the charts are built once per uploaded file.")
+    else:
+        st.info(f"Unable to chart your {current_year} activity.")
+    
+    st.divider()
+
+    # Response times and message lengths
+    st.subheader("⏱️ Response times & message lengths")
+    metrics = _message_metrics(st.session_state.get("source_hash", ""), current_year, table, year_idx)
+    if any(m["count"] for m in metrics.values()):
+        rows = ["| | p50 | p90 | p99 |", "|---|---|---|---|"]
+        for name, label in METRICS.items():
+            fmt = _fmt_chars if name.endswith("_length") else _fmt_duration
+            m = metrics[name]
+            rows.append(f"| {label} | {fmt(m['p50'])} | {fmt(m['p90'])} | {fmt(m['p99'])} |")
+        st.markdown("\n".join(rows))
+        gap_p50 = metrics["response_gap"]["p50"]
+        if gap_p50 == gap_p50:
+            st.write(f"In {current_year}, half of your questions got an answer within **{_fmt_duration(gap_p50)}**, and you typically wrote **{_fmt_chars(metrics['user_length']['p50'])}** per message.")
+        with st.expander("How is this calculated?"):
+            st.write("Orders the messages in each conversation by time. The response time is the gap between one of your messages and the assistant reply that follows it; think time is the gap between an assistant reply and your next message. Lengths count the characters in each message. p50 is the median, p90 and p99 are the values that 90% and 99% of messages fall under. Percentiles are estimated with a streaming quantile sketch (KLL), so memory stays small however long your history is.")
+    else:
+        st.info(f"Unable to measure response times or message lengths for {current_year}.")
+
+    st.divider()
+
+    # Most repeated question
+    repeats = _repeated_questions(
+        st.session_state.get("source_hash", ""),
+        current_year,
+        user_texts,
+        table["columns"]["msg_conv"][user_msg_idx].tolist(),
+    )
+    if repeats:
+        top_repeat = repeats[0]
+        st.markdown(f"### 🔁 **{top_repeat['count']}** times")
+        st.write(f"In {current_year}, your most repeated question was **\"{top_repeat['example']}\"**, which you asked **{top_repeat['count']}** times across **{top_repeat['conversations']}** conversations (counting close rewordings).")
+        if len(repeats) > 1:
+            st.write("Other things you kept asking:")
+            st.write("\n".join(f"• \"{r['example']}\" ({r['count']} times)" for r in repeats[1:]))
+        with st.expander("How is this calculated?"):
+            st.write("Normalises each of your messages (lowercase, punctuation removed), splits its UTF-8 text into overlapping 4-byte pieces and builds a MinHash signature. Locality-sensitive hashing finds likely matches without comparing every pair of messages, and each group gathers the messages that share about 70% or more of their pieces with one representative message. Very short messages like \"thanks\" are ignored, and so are groups that stay inside one conversation (edited or regenerated prompts). Groups are ranked by how many conversations they span.")
+    else:
+        st.markdown("### 🔁 **Most repeated question**")
+        if user_texts:
+            st.write(f"You didn't repeat yourself in {current_year}. Every question was a new one!")
+        else:
+            st.write(f"Unable to find your messages for {current_year}.")
+
+    st.divider()
+
     # Persona analysis
+    persona = None
     st.subheader("🎭 Your 2025 Chat Persona")
     
-    if convs:
+    if total:
         # Check if anthropic is available and API key is set
         if not ANTHROPIC_AVAILABLE:
             st.warning("⚠️ **Missing Dependency**: The `anthropic` module is not installed. Please run `pip install anthropic` to enable persona analysis.")
@@ -699,9 +855,15 @@ if parsed is not None:
             st.warning("⚠️ **API Key Required**: To analyze your chat persona, please set the `ANTHROPIC_API_KEY` environment variable with your Claude API key.")
             st.info("The persona analysis uses Claude 4 Sonnet to read through your actual conversation content and determine your personality based on what you discuss, not just titles or keywords.")
         else:
-            # Show loading spinner while analyzing
-            with st.spinner("🤖 Analyzing your conversations with Claude 4 Sonnet..."):
-                analysis_result = _analyze_persona_with_llm(convs)
+            # Reuse this upload's persona across reruns (radio, downloads) instead of calling the LLM again
+            persona_key = (st.session_state.get("source_hash", ""), current_year)
+            analysis_result = st.session_state.get("persona_result", {}).get(persona_key)
+            if analysis_result is None:
+                # Show loading spinner while analyzing
+                with st.spinner("🤖 Analyzing your conversations with Claude 4 Sonnet..."):
+                    analysis_result = _analyze_persona_with_llm(conversations_from_table(table, year_idx[:20]))
+                if "error" not in analysis_result:
+                    st.session_state["persona_result"] = {persona_key: analysis_result}
             
             if "error" in analysis_result:
                 st.error(f"❌ **Analysis failed**: {analysis_result['error']}")
@@ -780,11 +942,47 @@ if parsed is not None:
     
     st.divider()
 
+    # Share cards
+    if total:
+        st.subheader("📸 Share your ChatWrapped")
+        cleaned_titles = [t.lower().strip() for t in titles if t and t != "(untitled)"]
+        top_themes, _theme_examples = _theme_counts(cleaned_titles)
+        card_stats = {
+            "year": current_year,
+            "total_chats": total,
+            "avg_per_day": round(avg_per_day, 1) if avg_per_day is not None else None,
+            "peak_hour_label": time_label if starts else None,
+            "peak_hour_category": time_category if starts else None,
+            "streak_days": streak_len,
+            "streak_range": f"{streak_range[0]:%b %d} – {streak_range[1]:%b %d, %Y}" if streak_range else None,
+            "persona": persona,
+            "themes": [theme.replace("_", " ").title() for theme, _count in top_themes[:3]],
+        }
+        card_format = st.radio("Image format", ["PNG", "WEBP"], horizontal=True)
+        _share_card_templates()
+        cards = render_share_cards(card_stats, card_format)
+        mime = "image/png" if card_format == "PNG" else "image/webp"
+        for row_start in range(0, len(cards), 3):
+            for col, (card_key, image) in zip(st.columns(3), cards[row_start:row_start + 3]):
+                with col:
+                    st.image(image)
+                    st.download_button(
+                        "Download",
+                        data=image,
+                        file_name=f"chatwrapped-{current_year}-{card_key}.{card_format.lower()}",
+                        mime=mime,
+                        key=f"share_card_{card_key}",
+                        on_click="ignore",
+                    )
+        with st.expander("How are these made?"):
+            st.write("Each card is drawn straight from the stats above with Pillow, in parallel, using fonts and backgrounds that are loaded once per server. Cards are cached by a hash of your stats, so they are only drawn once.")
+
+        st.divider()
+
     # Titles preview (not in expander)
     st.subheader("Preview 2025 conversation titles (first 50)")
-    if convs:
-        all_titles = [conv.get("title", "(untitled)") for conv in convs if isinstance(conv, dict)]
-        preview_titles = all_titles[:50]
+    if total:
+        preview_titles = titles[:50]
         if preview_titles:
             st.write("\n".join(f"• {t}" for t in preview_titles))
         else: